@@ -1,3 +1,147 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
 
-# Register your models here.
+from . import stats
+from .changes import record
+from .models import Author, Change, Post, Comment, Task
+from .services import DELETE_CHUNK_SIZE, delete_posts
+
+REDACTED_COMMENT = "[removed by moderator]"
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that reads the planner's row estimate instead of running COUNT(*).
+
+    Only unfiltered changelists on PostgreSQL use the estimate, and only once
+    the table is large enough for the exact count to hurt. Partitions are
+    included, so the partitioned api_comment table is estimated correctly.
+    """
+
+    estimate_threshold = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT SUM(reltuples)::bigint FROM pg_class
+                    WHERE reltuples > 0 AND (
+                        oid = to_regclass(%s)
+                        OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s))
+                    )
+                    """,
+                    [queryset.model._meta.db_table] * 2,
+                )
+                estimate = cursor.fetchone()[0]
+            if estimate and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+def pk_chunks(queryset, chunk_size=DELETE_CHUNK_SIZE):
+    """Yield the primary keys of ``queryset`` in ascending chunks of ``chunk_size``.
+
+    Each chunk is read after the previous one was processed, seeking past
+    its last key, so "select all" never loads every id at once.
+    """
+    last = None
+    while True:
+        chunk = queryset.order_by('pk')
+        if last is not None:
+            chunk = chunk.filter(pk__gt=last)
+        pks = list(chunk.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return
+        yield pks
+        last = pks[-1]
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-id',)
+    list_per_page = 50
+
+    def get_actions(self, request):
+        # The stock delete action loads every selected row to render its
+        # confirmation page; the set-based actions below replace it.
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+
+@admin.register(Author)
+class AuthorAdmin(LargeTableAdmin):
+    list_display = ('id', 'name', 'email', 'user')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    search_fields = ('email__exact', 'user__username__exact')
+
+
+@admin.register(Post)
+class PostAdmin(LargeTableAdmin):
+    list_display = ('id', 'title', 'author', 'created_at', 'last_updated')
+    list_select_related = ('author',)
+    raw_id_fields = ('author',)
+    search_fields = ('title__exact', 'author__email__exact')
+    actions = ('delete_selected_posts',)
+
+    def has_delete_permission(self, request, obj=None):
+        # The stock delete view runs Django's collector and lists every
+        # comment and revision on its confirmation page; posts are only
+        # deleted through the chunked action below.
+        if obj is not None:
+            return False
+        return super().has_delete_permission(request)
+
+    @admin.action(description="Delete selected posts and their comments", permissions=['delete'])
+    def delete_selected_posts(self, request, queryset):
+        deleted = delete_posts(queryset)
+        self.message_user(request, f"Deleted {deleted} posts.", messages.SUCCESS)
+
+
+@admin.register(Comment)
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('id', 'post', 'created_at')
+    list_select_related = ('post',)
+    raw_id_fields = ('post',)
+    search_fields = ('post__title__exact',)
+    actions = ('redact_comments', 'delete_selected_comments')
+
+    @admin.action(description="Redact selected comments", permissions=['change'])
+    def redact_comments(self, request, queryset):
+        updated = 0
+        for comment_ids in pk_chunks(queryset):
+            with transaction.atomic():
+                updated += Comment.objects.filter(pk__in=comment_ids).update(content=REDACTED_COMMENT)
+                record(Change.COMMENT, comment_ids)
+        self.message_user(request, f"Redacted {updated} comments.", messages.SUCCESS)
+
+    @admin.action(description="Delete selected comments", permissions=['delete'])
+    def delete_selected_comments(self, request, queryset):
+        deleted = 0
+        for comment_ids in pk_chunks(queryset):
+            with transaction.atomic():
+                author_ids = Post.objects.filter(comments__pk__in=comment_ids).values_list('author_id', flat=True).distinct()
+                stats.invalidate(list(author_ids))
+                deleted += Comment.objects.filter(pk__in=comment_ids).delete()[0]
+                record(Change.COMMENT, comment_ids)
+        self.message_user(request, f"Deleted {deleted} comments.", messages.SUCCESS)
+
+
+@admin.register(Task)
+class TaskAdmin(LargeTableAdmin):
+    list_display = ('id', 'handler', 'key', 'attempts', 'failed', 'available_at')
+    search_fields = ('handler__exact',)
+    actions = ('retry_tasks',)
+
+    @admin.action(description="Retry selected tasks", permissions=['change'])
+    def retry_tasks(self, request, queryset):
+        updated = queryset.update(failed=False, attempts=0, available_at=timezone.now())
+        self.message_user(request, f"Queued {updated} tasks for retry.", messages.SUCCESS)
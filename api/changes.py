@@ -0,0 +1,121 @@
+"""Change log behind the ``changesSince`` delta-sync query.
+
+Every write to a post or comment appends a ``Change`` row. A sync reads the
+next slice of the log after its cursor, so its cost follows the number of
+changes rather than the size of the dataset. Any logged object that no longer
+exists is reported as a tombstone. Deleting a post implicitly deletes its
+comments.
+
+Primary keys are handed out at insert, not at commit, so a transaction can
+commit a row below one a client has already synced past. On PostgreSQL each
+row therefore records the id of the transaction that wrote it, the log is
+read in (transaction id, primary key) order, and only rows written by
+transactions older than every transaction still in progress are returned.
+Anything committed later has a higher transaction id and sorts after the
+cursor. Other backends commit writes one at a time in primary key order and
+record a transaction id of 0.
+
+The price is liveness: the horizon comes from a snapshot of the whole
+server, so a single long-running or idle-in-transaction session, in any
+database on it, holds back every sync until that session ends. Keep
+``idle_in_transaction_session_timeout`` set on the server.
+"""
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Change, Comment, Post
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
+
+def transaction_id():
+    if connection.vendor != 'postgresql':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_current_xact_id()::text::bigint")
+        return cursor.fetchone()[0]
+
+
+def visible_horizon():
+    """Return the oldest id of another transaction still in progress, or None.
+
+    The reader's own transaction is left out: its rows are visible to it and
+    anything written after them gets a higher transaction id.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COALESCE(
+                (SELECT MIN(xid::text::bigint) FROM pg_snapshot_xip(snapshot) AS xid),
+                pg_snapshot_xmax(snapshot)::text::bigint + 1
+            )
+            FROM pg_current_snapshot() AS snapshot
+            """
+        )
+        return cursor.fetchone()[0]
+
+
+def parse_cursor(value):
+    """Parse a ``"<xid>.<id>"`` cursor. A bare id from before xids were logged means xid 0."""
+    if not value:
+        return 0, 0
+    xid, _, pk = value.rpartition('.')
+    return int(xid or 0), int(pk)
+
+
+def format_cursor(xid, pk):
+    return f"{xid}.{pk}"
+
+
+def record(kind, object_ids):
+    if not object_ids:
+        return
+    # Under autocommit the xid read and the insert would otherwise be two
+    # transactions, and the rows would carry an id older than their commit.
+    with transaction.atomic():
+        xid = transaction_id()
+        Change.objects.bulk_create(
+            [Change(kind=kind, object_id=object_id, xid=xid) for object_id in object_ids],
+            batch_size=1000,
+        )
+
+
+def changes_since(cursor=(0, 0), limit=DEFAULT_LIMIT):
+    limit = max(1, min(limit, MAX_LIMIT))
+    xid, pk = cursor
+    log = Change.objects.filter(Q(xid__gt=xid) | Q(xid=xid, pk__gt=pk))
+    horizon = visible_horizon()
+    if horizon is not None:
+        log = log.filter(xid__lt=horizon)
+    entries = list(
+        log.order_by('xid', 'pk')
+        .values_list('xid', 'pk', 'kind', 'object_id')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    changed = {Change.POST: set(), Change.COMMENT: set()}
+    for _, _, kind, object_id in entries:
+        changed[kind].add(object_id)
+    posts = list(Post.objects.filter(pk__in=changed[Change.POST]).select_related('author').order_by('pk'))
+    comments = list(Comment.objects.filter(pk__in=changed[Change.COMMENT]).select_related('post').order_by('pk'))
+
+    live = {
+        Change.POST: {post.pk for post in posts},
+        Change.COMMENT: {comment.pk for comment in comments},
+    }
+    tombstones = [
+        {'kind': kind, 'id': object_id}
+        for kind, ids in changed.items()
+        for object_id in sorted(ids - live[kind])
+    ]
+    return {
+        'posts': posts,
+        'comments': comments,
+        'tombstones': tombstones,
+        'cursor': format_cursor(*entries[-1][:2]) if entries else format_cursor(xid, pk),
+        'has_more': has_more,
+    }
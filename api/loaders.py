@@ -0,0 +1,33 @@
+"""Per-request memoisation shared by every operation in a GraphQL request.
+
+The GraphQL context is the Django request, so when a client batches several
+operations into one POST they all see the same cache and repeated lookups
+(the same post, the same comment list) hit the database once.
+"""
+from graphql import OperationType
+
+CACHE_ATTR = '_graphql_loader_cache'
+
+
+def load(context, key, fetch):
+    cache = getattr(context, CACHE_ATTR, None)
+    if cache is None:
+        cache = {}
+        setattr(context, CACHE_ATTR, cache)
+    if key not in cache:
+        cache[key] = fetch()
+    return cache[key]
+
+
+def clear(context):
+    if hasattr(context, CACHE_ATTR):
+        delattr(context, CACHE_ATTR)
+
+
+class LoaderCacheMiddleware:
+    """Drops the request cache before each mutation so later operations in a batch never read stale rows."""
+
+    def resolve(self, next, root, info, **kwargs):
+        if info.path.prev is None and info.operation.operation == OperationType.MUTATION:
+            clear(info.context)
+        return next(root, info, **kwargs)
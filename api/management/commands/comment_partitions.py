@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+
+from api.partitions import (
+    add_months, create_partition, detach_partition, is_partitioned,
+    list_partitions, month_start, partition_month, partitioning_enabled,
+)
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly Comment partitions and detach or archive cold ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int,
+            default=getattr(settings, 'COMMENT_PARTITION_MONTHS_AHEAD', 3),
+            help="Number of future months to create partitions for.",
+        )
+        parser.add_argument(
+            '--retain', type=int,
+            default=getattr(settings, 'COMMENT_PARTITION_MONTHS_RETAINED', None),
+            help="Detach partitions older than this many months. Keeps everything if omitted.",
+        )
+        parser.add_argument(
+            '--archive-schema',
+            default=getattr(settings, 'COMMENT_PARTITION_ARCHIVE_SCHEMA', None),
+            help="Move detached partitions into this schema instead of leaving them in place.",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would change.")
+
+    def handle(self, *args, ahead, retain, archive_schema, dry_run, **options):
+        if not partitioning_enabled(connection):
+            raise CommandError("Comment partitioning requires PostgreSQL and COMMENT_PARTITIONING = True.")
+        current = month_start(datetime.now(timezone.utc))
+
+        with connection.cursor() as cursor:
+            if not is_partitioned(cursor):
+                raise CommandError("api_comment is not partitioned; run migrate with COMMENT_PARTITIONING enabled.")
+            existing = set(list_partitions(cursor))
+
+        # Each month is its own transaction so one failure does not stop the rest.
+        failed = []
+        for offset in range(ahead + 1):
+            month = add_months(current, offset)
+            name = f"{month:%Y-%m}"
+            if any(partition_month(p) == month for p in existing):
+                continue
+            if not dry_run and not self.run_step(f"create partition for {name}", create_partition, month):
+                failed.append(name)
+                continue
+            self.stdout.write(f"{'Would create' if dry_run else 'Created'} partition for {name}")
+
+        if retain is not None:
+            cutoff = add_months(current, -retain)
+            for partition in sorted(existing):
+                month = partition_month(partition)
+                if month is None or month >= cutoff:
+                    continue
+                if not dry_run and not self.run_step(f"detach {partition}", detach_partition, partition, archive_schema):
+                    failed.append(partition)
+                    continue
+                target = f"{archive_schema}.{partition}" if archive_schema else partition
+                self.stdout.write(f"{'Would detach' if dry_run else 'Detached'} {partition} -> {target}")
+
+        if failed:
+            raise CommandError(f"Failed: {', '.join(failed)}")
+
+    def run_step(self, description, step, *args):
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                step(cursor, *args)
+        except DatabaseError as e:
+            self.stderr.write(f"Could not {description}: {e}")
+            return False
+        return True
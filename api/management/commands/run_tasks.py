@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.tasks import run_pending
+
+
+class Command(BaseCommand):
+    help = "Process deferred tasks queued by mutations."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--visibility-timeout', type=int, default=30,
+                            help="Seconds a claimed task stays hidden from other workers.")
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help="Seconds to wait when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit.")
+
+    def handle(self, *args, batch_size, visibility_timeout, max_attempts, sleep, once, **options):
+        while True:
+            processed = run_pending(batch_size, visibility_timeout, max_attempts)
+            if processed:
+                self.stdout.write(f"Processed {processed} tasks")
+                continue
+            if once:
+                return
+            time.sleep(sleep)
@@ -0,0 +1,98 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations
+
+from api.partitions import (
+    DEFAULT_PARTITION, TABLE, add_months, create_partition, is_partitioned,
+    month_start, partitioning_enabled,
+)
+
+LEGACY_TABLE = f'{TABLE}_legacy'
+SEQUENCE = f'{TABLE}_partitioned_id_seq'
+
+
+def partition_comments(apps, schema_editor):
+    connection = schema_editor.connection
+    if not partitioning_enabled(connection):
+        return
+    with connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            return
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}")
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0), MIN(created_at) FROM {LEGACY_TABLE}")
+        max_id, oldest = cursor.fetchone()
+        cursor.execute(f"CREATE SEQUENCE {SEQUENCE}")
+        cursor.execute(
+            f"""
+            CREATE TABLE {TABLE} (
+                id bigint NOT NULL DEFAULT nextval('{SEQUENCE}'),
+                content text NOT NULL,
+                created_at timestamp with time zone NOT NULL,
+                post_id bigint NOT NULL
+                    REFERENCES api_post (id) DEFERRABLE INITIALLY DEFERRED,
+                CONSTRAINT {TABLE}_partitioned_pkey PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+            """
+        )
+        cursor.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+        cursor.execute(f"CREATE INDEX {TABLE}_post_id_created_at ON {TABLE} (post_id, created_at)")
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+
+        now = datetime.now(timezone.utc)
+        month = month_start(oldest or now)
+        last = add_months(month_start(now), getattr(settings, 'COMMENT_PARTITION_MONTHS_AHEAD', 3))
+        while month <= last:
+            create_partition(cursor, month)
+            month = add_months(month, 1)
+
+        cursor.execute(
+            f"INSERT INTO {TABLE} (id, content, created_at, post_id) "
+            f"SELECT id, content, created_at, post_id FROM {LEGACY_TABLE}"
+        )
+        cursor.execute("SELECT setval(%s, %s, %s)", [SEQUENCE, max(max_id, 1), max_id > 0])
+        cursor.execute(f"DROP TABLE {LEGACY_TABLE}")
+
+
+def unpartition_comments(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}")
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {LEGACY_TABLE}")
+        max_id = cursor.fetchone()[0]
+        cursor.execute(
+            f"""
+            CREATE TABLE {TABLE} (
+                id bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+                content text NOT NULL,
+                created_at timestamp with time zone NOT NULL,
+                post_id bigint NOT NULL
+                    REFERENCES api_post (id) DEFERRABLE INITIALLY DEFERRED
+            )
+            """
+        )
+        cursor.execute(f"CREATE INDEX {TABLE}_post_id ON {TABLE} (post_id)")
+        cursor.execute(
+            f"INSERT INTO {TABLE} (id, content, created_at, post_id) "
+            f"SELECT id, content, created_at, post_id FROM {LEGACY_TABLE}"
+        )
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, %s)",
+            [TABLE, max(max_id, 1), max_id > 0],
+        )
+        cursor.execute(f"DROP TABLE {LEGACY_TABLE} CASCADE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_author_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_comments, unpartition_comments),
+    ]
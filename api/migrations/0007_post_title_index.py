@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 19:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_partition_comment'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='title',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1 on 2026-10-19 19:41
+
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    # Seed the log with every existing row so a sync from cursor 0 is complete.
+    for kind, table in (('post', 'api_post'), ('comment', 'api_comment')):
+        schema_editor.execute(
+            f"INSERT INTO api_change (kind, object_id, created_at) "
+            f"SELECT %s, id, CURRENT_TIMESTAMP FROM {table} ORDER BY id",
+            [kind],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1 on 2026-10-19 19:45
+
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def snapshot_existing_posts(apps, schema_editor):
+    # Every post starts its history with a full snapshot of its current content.
+    Post = apps.get_model('api', 'Post')
+    PostRevision = apps.get_model('api', 'PostRevision')
+    batch = []
+    for post in Post.objects.only('pk', 'title', 'content').iterator(chunk_size=1000):
+        batch.append(PostRevision(
+            post_id=post.pk, number=1, title=post.title, is_snapshot=True,
+            data=zlib.compress(post.content.encode()),
+        ))
+        if len(batch) >= 1000:
+            PostRevision.objects.bulk_create(batch)
+            batch = []
+    PostRevision.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('is_snapshot', models.BooleanField(default=False)),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='api.post')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('post', 'number'), name='unique_post_revision_number')],
+            },
+        ),
+        migrations.RunPython(snapshot_existing_posts, migrations.RunPython.noop),
+    ]
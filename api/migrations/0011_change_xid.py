@@ -0,0 +1,22 @@
+# Generated by Django 5.1 on 2026-10-19 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_postrevision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='change',
+            name='xid',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['xid', 'id'], name='api_change_xid_b16a56_idx'),
+        ),
+    ]
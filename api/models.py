@@ -1,7 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.utils import timezone
 
 class Author(models.Model):
     user = models.ForeignKey(User, related_name='authors', on_delete=models.CASCADE)
@@ -13,7 +12,7 @@ class Author(models.Model):
         return self.name
 
 class Post(models.Model):
-    title = models.CharField(max_length=255)
+    title = models.CharField(max_length=255, db_index=True)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -31,7 +30,50 @@ class Comment(models.Model):
     def __str__(self):
         return f"Comment by {self.id}"
 
-@receiver(post_save, sender=Comment)
-def update_post_timestamp(sender, instance, **kwargs):
-    instance.post.updated_at = instance.created_at
-    instance.post.save()
+class PostRevision(models.Model):
+    post = models.ForeignKey(Post, related_name='revisions', on_delete=models.CASCADE)
+    number = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    is_snapshot = models.BooleanField(default=False)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'number'], name='unique_post_revision_number'),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} r{self.number}"
+
+class Task(models.Model):
+    handler = models.CharField(max_length=255)
+    key = models.BigIntegerField(null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    failed = models.BooleanField(default=False)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['failed', 'available_at'])]
+
+    def __str__(self):
+        return f"{self.handler}({self.key})"
+
+class Change(models.Model):
+    POST = 'post'
+    COMMENT = 'comment'
+    KIND_CHOICES = [(POST, 'Post'), (COMMENT, 'Comment')]
+
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # Id of the writing transaction on PostgreSQL, see api.changes.
+    xid = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['xid', 'id'])]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
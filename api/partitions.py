@@ -0,0 +1,104 @@
+"""Helpers for the optional monthly range partitioning of ``api_comment``.
+
+When ``COMMENT_PARTITIONING`` is enabled on PostgreSQL, migration 0006 turns
+``api_comment`` into a table partitioned by ``created_at`` with one partition
+per calendar month. The ``comment_partitions`` management command uses these
+helpers to create upcoming partitions and to detach or archive cold ones.
+"""
+import re
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+TABLE = 'api_comment'
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_RE = re.compile(rf'^{TABLE}_y(\d{{4}})m(\d{{2}})$')
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month):
+    return f'{TABLE}_y{month.year:04d}m{month.month:02d}'
+
+
+def partition_month(name):
+    match = PARTITION_RE.match(name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def partitioning_enabled(connection):
+    return connection.vendor == 'postgresql' and getattr(settings, 'COMMENT_PARTITIONING', False)
+
+
+def is_partitioned(cursor):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+        [TABLE],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor):
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(%s)
+        ORDER BY child.relname
+        """,
+        [TABLE],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def create_partition(cursor, month):
+    name = partition_name(month)
+    bounds = [month, add_months(month, 1)]
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s)",
+        bounds,
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)", bounds)
+        return name
+
+    # Postgres refuses a new range while the default partition holds rows
+    # for it, so those rows are moved into the new table before attaching.
+    cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= %s AND created_at < %s
+            RETURNING id, content, created_at, post_id
+        )
+        INSERT INTO {name} (id, content, created_at, post_id) SELECT * FROM moved
+        """,
+        bounds,
+    )
+    cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", bounds)
+    return name
+
+
+def detach_partition(cursor, name, archive_schema=None):
+    cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+    # The detached table keeps a standalone FK to api_post, which would make
+    # every post with archived comments impossible to delete.
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [name],
+    )
+    for (constraint,) in cursor.fetchall():
+        cursor.execute(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"')
+    if archive_schema:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}")
+        cursor.execute(f"ALTER TABLE {name} SET SCHEMA {archive_schema}")
@@ -0,0 +1,222 @@
+"""Rate limits and concurrency caps for expensive GraphQL root fields.
+
+Limits are configured per root field in ``GRAPHQL_RATE_LIMITS``::
+
+    GRAPHQL_RATE_LIMITS = {
+        'createComment': {'rate': 0.5, 'burst': 5, 'concurrency': 2},
+    }
+
+``rate`` is the number of tokens refilled per second, ``burst`` the bucket
+size and ``concurrency`` the number of in-flight resolutions allowed per
+client. Authenticated clients are identified by user id, which covers
+verified JWTs since ``JSONWebTokenMiddleware`` runs first; everyone else is
+identified by address. Counters live in the store named by
+``GRAPHQL_RATE_LIMIT_STORE``; the default ``CacheStore`` keeps them in the
+shared cache so the limits hold across workers.
+
+A concurrency slot is held until the whole operation has executed, nested
+fields included, and released by ``BlogGraphQLView``.
+"""
+import math
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from graphql import GraphQLError
+
+
+class RateLimitStore:
+    """Interface for the shared counter store used by ``RateLimitMiddleware``."""
+
+    def consume(self, key, rate, burst):
+        """Take one token from ``key``'s bucket.
+
+        Returns 0 when a token was taken, otherwise the number of seconds
+        until one becomes available.
+        """
+        raise NotImplementedError
+
+    def acquire(self, key, limit):
+        """Reserve one of ``limit`` concurrent slots for ``key``; return whether it succeeded."""
+        raise NotImplementedError
+
+    def release(self, key):
+        raise NotImplementedError
+
+
+class LocalMemoryStore(RateLimitStore):
+    """Per-process store. Limits apply to each worker separately."""
+
+    max_keys = 10000
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.slots = {}
+
+    def consume(self, key, rate, burst):
+        with self.lock:
+            now = self.clock()
+            tokens, updated = self.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                self._prune(now)
+                return 0
+            self.buckets[key] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def acquire(self, key, limit):
+        with self.lock:
+            in_flight = self.slots.get(key, 0)
+            if in_flight >= limit:
+                return False
+            self.slots[key] = in_flight + 1
+            return True
+
+    def release(self, key):
+        with self.lock:
+            in_flight = self.slots.get(key, 0) - 1
+            if in_flight > 0:
+                self.slots[key] = in_flight
+            else:
+                self.slots.pop(key, None)
+
+    def _prune(self, now):
+        # Buckets idle for a minute have refilled for any sane rate; forget them.
+        if len(self.buckets) > self.max_keys:
+            self.buckets = {
+                key: value for key, value in self.buckets.items() if now - value[1] < 60
+            }
+
+
+class CacheStore(RateLimitStore):
+    """Store shared by every worker, kept in the ``default`` cache (Redis in production).
+
+    Cache increments are atomic, so the bucket is approximated by a fixed
+    window of ``burst / rate`` seconds that admits ``burst`` requests. Slot
+    counters expire after ``slot_timeout`` seconds, which frees slots a
+    crashed worker never released.
+    """
+
+    slot_timeout = 300
+
+    def __init__(self, alias='default', clock=time.time):
+        self.cache = caches[alias]
+        self.clock = clock
+
+    def consume(self, key, rate, burst):
+        window = burst / rate
+        now = self.clock()
+        index = int(now // window)
+        counter = f"ratelimit:{key}:{index}"
+        if self._incr(counter, math.ceil(window) + 1) <= burst:
+            return 0
+        return (index + 1) * window - now
+
+    def acquire(self, key, limit):
+        counter = f"ratelimit-slots:{key}"
+        if self._incr(counter, self.slot_timeout) <= limit:
+            return True
+        self.release(key)
+        return False
+
+    def release(self, key):
+        try:
+            self.cache.decr(f"ratelimit-slots:{key}")
+        except ValueError:
+            pass
+
+    def _incr(self, counter, timeout):
+        if self.cache.add(counter, 1, timeout):
+            return 1
+        try:
+            return self.cache.incr(counter)
+        except ValueError:
+            # Expired between add() and incr(); start a fresh counter.
+            self.cache.add(counter, 1, timeout)
+            return 1
+
+
+@lru_cache(maxsize=None)
+def get_store():
+    path = getattr(settings, 'GRAPHQL_RATE_LIMIT_STORE', 'api.ratelimit.CacheStore')
+    return import_string(path)()
+
+
+def release_slots(request):
+    """Release the concurrency slots the current operation holds."""
+    store = get_store()
+    for key in getattr(request, '_rate_limit_slots', ()):
+        store.release(key)
+    request._rate_limit_slots = []
+
+
+def client_address(request):
+    """Return the address of the client that connected to the first trusted proxy.
+
+    With ``GRAPHQL_RATE_LIMIT_TRUSTED_PROXIES`` set to ``n``, the ``n``-th
+    X-Forwarded-For entry from the right was appended by our outermost proxy
+    and cannot be forged; anything left of it is client-supplied. When the
+    header is shorter than that the request did not come through the proxies,
+    so the socket address is used.
+    """
+    trusted = getattr(settings, 'GRAPHQL_RATE_LIMIT_TRUSTED_PROXIES', 0)
+    if trusted:
+        forwarded = [
+            address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+            if address.strip()
+        ]
+        if len(forwarded) >= trusted:
+            return forwarded[-trusted]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{client_address(request)}"
+
+
+class RateLimitMiddleware:
+    """Applies ``GRAPHQL_RATE_LIMITS`` to root fields before they are resolved.
+
+    Must be listed before ``JSONWebTokenMiddleware`` in ``GRAPHENE['MIDDLEWARE']``
+    so that it runs after authentication and can key limits by user. The view
+    must call ``release_slots`` once the operation has executed.
+    """
+
+    def resolve(self, next, root, info, **kwargs):
+        if info.path.prev is not None:
+            return next(root, info, **kwargs)
+        limit = getattr(settings, 'GRAPHQL_RATE_LIMITS', {}).get(info.field_name)
+        if limit is None:
+            return next(root, info, **kwargs)
+
+        store = get_store()
+        key = f"{client_key(info.context)}:{info.field_name}"
+        if 'rate' in limit:
+            retry_after = store.consume(key, limit['rate'], limit.get('burst', 1))
+            if retry_after:
+                raise GraphQLError(
+                    f"Rate limit exceeded for {info.field_name}.",
+                    extensions={'code': 'RATE_LIMITED', 'retryAfter': round(retry_after, 3)},
+                )
+        if 'concurrency' not in limit:
+            return next(root, info, **kwargs)
+        if not store.acquire(key, limit['concurrency']):
+            raise GraphQLError(
+                f"Too many concurrent {info.field_name} requests.",
+                extensions={'code': 'CONCURRENCY_LIMITED'},
+            )
+        # Nested fields resolve after this returns, so the slot is kept
+        # until the view has finished executing the operation.
+        if not hasattr(info.context, '_rate_limit_slots'):
+            info.context._rate_limit_slots = []
+        info.context._rate_limit_slots.append(key)
+        return next(root, info, **kwargs)
@@ -1,20 +1,42 @@
 import graphene
 from graphene_django.types import DjangoObjectType
+from graphene_django.fields import DjangoConnectionField
 from graphene_django.filter import DjangoFilterConnectionField
 from django.core.exceptions import ValidationError, PermissionDenied
 from django.contrib.auth import get_user_model
-from .models import Author, Post, Comment
+from .models import Author, Post, Comment, Change, PostRevision
+from . import changes, loaders, revisions, stats
 from .services import create_author, update_author, create_post, update_post, delete_post, create_comment
 import graphql_jwt
 from graphene import relay
+from graphql import GraphQLError
+from django.db.models import Subquery
 
 User = get_user_model()
 
+MAX_STATS_BATCH = 100
+
 class AuthorType(DjangoObjectType):
     class Meta:
         model = Author
 
+class PostRevisionType(DjangoObjectType):
+    content = graphene.String()
+
+    class Meta:
+        model = PostRevision
+        interfaces = (relay.Node,)
+        fields = ('number', 'title', 'is_snapshot', 'created_at')
+
+    def resolve_content(self, info):
+        # Rebuilt on demand; versions reconstructed for one node are reused
+        # by the rest of the page through the request's loader cache.
+        cache = loaders.load(info.context, 'revision-contents', dict)
+        return revisions.reconstruct(self, cache)
+
 class PostType(DjangoObjectType):
+    revisions = DjangoConnectionField(PostRevisionType)
+
     class Meta:
         model = Post
         interfaces = (relay.Node,)
@@ -23,14 +45,49 @@ class PostType(DjangoObjectType):
             'content': ['icontains'],
         }
 
+    def resolve_revisions(self, info, **kwargs):
+        # History can hold text the author removed on purpose, so only the
+        # author and staff may read it. Revisions are not exposed anywhere
+        # else, which also guards their content.
+        user = info.context.user
+        if not user.is_authenticated or not (user.is_staff or self.author.user_id == user.pk):
+            raise PermissionDenied("You are not allowed to view this post's revisions.")
+        return self.revisions.defer('data').order_by('-number')
+
 class CommentType(DjangoObjectType):
     class Meta:
         model = Comment
 
+class TombstoneType(graphene.ObjectType):
+    kind = graphene.String()
+    id = graphene.ID()
+
+    def resolve_id(self, info):
+        if self['kind'] == Change.POST:
+            return relay.Node.to_global_id(PostType._meta.name, self['id'])
+        return self['id']
+
+class ChangeSetType(graphene.ObjectType):
+    posts = graphene.List(PostType)
+    comments = graphene.List(CommentType)
+    tombstones = graphene.List(TombstoneType)
+    cursor = graphene.String()
+    has_more = graphene.Boolean()
+
+class AuthorStatsType(graphene.ObjectType):
+    author_id = graphene.Int()
+    post_count = graphene.Int()
+    total_comments = graphene.Int()
+    latest_post_date = graphene.DateTime()
+    most_commented_post = graphene.Field(PostType)
+
 class Query(graphene.ObjectType):
     all_posts = DjangoFilterConnectionField(PostType, author_id=graphene.Int(), title_contains=graphene.String())
     post = graphene.Field(PostType, id=graphene.Int(required=True))
     all_comments = graphene.List(CommentType, post_id=graphene.Int(required=True))
+    changes_since = graphene.Field(ChangeSetType, cursor=graphene.String(), limit=graphene.Int())
+    author_stats = graphene.Field(AuthorStatsType, author_id=graphene.Int(required=True))
+    authors_stats = graphene.List(AuthorStatsType, author_ids=graphene.List(graphene.NonNull(graphene.Int), required=True))
 
     def resolve_all_posts(self, info, author_id=None, title_contains=None):
         posts = Post.objects.all()
@@ -41,10 +98,30 @@ class Query(graphene.ObjectType):
         return posts
 
     def resolve_post(self, info, id):
-        return Post.objects.get(pk=id)
+        return loaders.load(info.context, ('post', id), lambda: Post.objects.get(pk=id))
 
     def resolve_all_comments(self, info, post_id):
-        return Comment.objects.filter(post_id=post_id)
+        # Comment.created_at is set on insert (auto_now_add), so a comment is
+        # never older than its post and this bound drops no rows. It lets a
+        # partitioned api_comment skip every month before the post at run time.
+        post_created_at = Post.objects.filter(pk=post_id).values('created_at')
+        comments = Comment.objects.filter(post_id=post_id, created_at__gte=Subquery(post_created_at))
+        return loaders.load(info.context, ('comments', post_id), lambda: list(comments))
+
+    def resolve_changes_since(self, info, cursor=None, limit=changes.DEFAULT_LIMIT):
+        try:
+            position = changes.parse_cursor(cursor)
+        except ValueError:
+            raise GraphQLError("Invalid cursor.")
+        return ChangeSetType(**changes.changes_since(position, limit))
+
+    def resolve_author_stats(self, info, author_id):
+        return stats.author_stats([author_id])[0]
+
+    def resolve_authors_stats(self, info, author_ids):
+        if len(author_ids) > MAX_STATS_BATCH:
+            raise GraphQLError(f"At most {MAX_STATS_BATCH} authors can be requested at once.")
+        return stats.author_stats(author_ids)
 
 class CreateAuthor(graphene.Mutation):
     class Arguments:
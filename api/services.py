@@ -1,12 +1,15 @@
-
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.db.models import Q
+from . import stats
 from .models import Author, Post, Comment
+from .tasks import enqueue
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+DELETE_CHUNK_SIZE = 1000
+
 def create_author(name, email, bio=None, user_id=None):
     if Author.objects.filter(email=email).exists():
         raise ValidationError("An author with this email already exists.")
@@ -46,6 +49,7 @@ def create_post(title, content, author_id):
         author = Author.objects.get(pk=author_id)
         post = Post(title=title, content=content, author=author)
         post.save()
+        stats.invalidate([author_id])
         return post
     except Author.DoesNotExist:
         raise ValidationError("Author not found.")
@@ -54,35 +58,78 @@ def create_post(title, content, author_id):
 
 def update_post(id, title=None, content=None):
     try:
-        post = Post.objects.get(pk=id)
-        if title and Post.objects.filter(title=title).exclude(id=id).exists():
-            raise ValidationError("A post with this title already exists.")
-        if title:
-            post.title = title
-        if content:
-            post.content = content
-        post.save()
+        with transaction.atomic():
+            # Lock the row so concurrent edits get consecutive revision numbers.
+            post = Post.objects.select_for_update().get(pk=id)
+            if title and Post.objects.filter(title=title).exclude(id=id).exists():
+                raise ValidationError("A post with this title already exists.")
+            if title:
+                post.title = title
+            if content:
+                post.content = content
+            post.save()
+        stats.invalidate([post.author_id])
         return post
     except Post.DoesNotExist:
         raise ValidationError("Post not found.")
     except IntegrityError as e:
         raise ValidationError(f"Error updating post: {e}")
 
-def delete_post(id):
+def _purge_posts(post_ids, chunk_size=DELETE_CHUNK_SIZE):
+    # Comments are removed in bounded batches of primary keys so a post with
+    # a huge comment thread never holds one long-running DELETE or loads the
+    # whole cascade into memory. Once the comments are gone the post rows are
+    # deleted with nothing left to collect.
+    author_ids = list(Post.objects.filter(pk__in=post_ids).values_list('author_id', flat=True).distinct())
+    while True:
+        comment_ids = list(
+            Comment.objects.filter(post_id__in=post_ids)
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not comment_ids:
+            break
+        with transaction.atomic():
+            Comment.objects.filter(pk__in=comment_ids).delete()
+    _, deleted = Post.objects.filter(pk__in=post_ids).delete()
+    stats.invalidate(author_ids)
+    return deleted.get(Post._meta.label, 0)
+
+
+def delete_post(id, background=False, chunk_size=DELETE_CHUNK_SIZE):
     try:
-        post = Post.objects.get(pk=id)
-        post.delete()
+        post = Post.objects.only('pk').get(pk=id)
+        if background:
+            enqueue('api.services._purge_posts', post.pk)
+        else:
+            _purge_posts([post.pk], chunk_size)
         return True
     except Post.DoesNotExist:
         raise ValidationError("Post not found.")
     except IntegrityError as e:
         raise ValidationError(f"Error deleting post: {e}")
 
+def delete_posts(queryset, chunk_size=DELETE_CHUNK_SIZE):
+    deleted = 0
+    try:
+        while True:
+            post_ids = list(queryset.values_list('pk', flat=True)[:chunk_size])
+            if not post_ids:
+                return deleted
+            deleted += _purge_posts(post_ids, chunk_size)
+    except IntegrityError as e:
+        raise ValidationError(f"Error deleting posts: {e}")
+
+def delete_author_posts(author_id, chunk_size=DELETE_CHUNK_SIZE):
+    if not Author.objects.filter(pk=author_id).exists():
+        raise ValidationError("Author not found.")
+    return delete_posts(Post.objects.filter(author_id=author_id), chunk_size)
+
 def create_comment(content, post_id):
     try:
         post = Post.objects.get(pk=post_id)
         comment = Comment(content=content, post=post)
         comment.save()
+        stats.invalidate([post.author_id])
         return comment
     except Post.DoesNotExist:
         raise ValidationError("Post not found.")
@@ -1,11 +1,28 @@
-from datetime import timezone, datetime
-
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Comment, Post
+from .changes import record
+from .revisions import record_revision
+from .models import Change, Comment, Post
+from .tasks import enqueue
 
 @receiver(post_save, sender=Comment)
 def update_post_last_updated(sender, instance, **kwargs):
-    post = instance.post
-    post.last_updated = datetime.now()
-    post.save()
+    enqueue('api.tasks.touch_posts', instance.post_id)
+
+@receiver(post_save, sender=Comment)
+def record_comment_change(sender, instance, **kwargs):
+    record(Change.COMMENT, [instance.pk])
+
+@receiver(post_save, sender=Post)
+def record_post_change(sender, instance, **kwargs):
+    record(Change.POST, [instance.pk])
+
+@receiver(post_save, sender=Post)
+def record_post_revision(sender, instance, **kwargs):
+    record_revision(instance)
+
+# Comments deliberately have no post_delete receiver: it would stop Django
+# from fast-deleting them in bulk. A post's tombstone covers its comments.
+@receiver(post_delete, sender=Post)
+def record_post_deletion(sender, instance, **kwargs):
+    record(Change.POST, [instance.pk])
@@ -0,0 +1,81 @@
+"""Author dashboard aggregates, computed for a whole batch of authors at once.
+
+One grouped query counts the comments of every post of the requested
+authors and uses window functions partitioned by author for the totals. Only
+each author's most-commented post is kept, so the query yields one row per
+author. Results are cached per author in the shared cache and invalidated by
+the write functions in ``api.services`` and by ``api.tasks.touch_posts``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Func, Max, Window
+from django.db.models.functions import RowNumber
+
+from .models import Post
+
+CACHE_KEY = 'author-stats:{}'
+
+
+class WindowSum(Func):
+    # Sum() refuses to wrap another aggregate, but SUM(COUNT(...)) OVER (...)
+    # is exactly what summing per-post counts across an author needs.
+    function = 'SUM'
+    window_compatible = True
+
+
+def _compute(author_ids):
+    by_author = {'partition_by': F('author_id')}
+    posts = (
+        Post.objects.filter(author_id__in=author_ids)
+        .annotate(comment_count=Count('comments'))
+        .annotate(
+            post_count=Window(Count('pk'), **by_author),
+            total_comments=Window(WindowSum('comment_count'), **by_author),
+            latest_post_date=Window(Max('created_at'), **by_author),
+            rank=Window(RowNumber(), order_by=[F('comment_count').desc(), F('pk').asc()], **by_author),
+        )
+        .filter(rank=1)
+    )
+    return {
+        post.author_id: {
+            'author_id': post.author_id,
+            'post_count': post.post_count,
+            'total_comments': int(post.total_comments),
+            'latest_post_date': post.latest_post_date,
+            'most_commented_post': post,
+        }
+        for post in posts
+    }
+
+
+def author_stats(author_ids):
+    """Return a stats dict for each id in ``author_ids``, in the same order."""
+    keys = {author_id: CACHE_KEY.format(author_id) for author_id in author_ids}
+    cached = cache.get_many(keys.values())
+    stats = {author_id: cached[key] for author_id, key in keys.items() if key in cached}
+
+    missing = [author_id for author_id in keys if author_id not in stats]
+    if missing:
+        computed = _compute(missing)
+        for author_id in missing:
+            stats[author_id] = computed.get(author_id, {
+                'author_id': author_id,
+                'post_count': 0,
+                'total_comments': 0,
+                'latest_post_date': None,
+                'most_commented_post': None,
+            })
+        cache.set_many(
+            {keys[author_id]: stats[author_id] for author_id in missing},
+            getattr(settings, 'AUTHOR_STATS_CACHE_TIMEOUT', 300),
+        )
+    return [stats[author_id] for author_id in author_ids]
+
+
+def invalidate(author_ids):
+    # Delete again on commit so a concurrent read cannot re-cache the stats
+    # from before this transaction's writes became visible.
+    keys = [CACHE_KEY.format(author_id) for author_id in set(author_ids)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,137 @@
+"""A small database-backed queue for side effects that can run after a request.
+
+``enqueue`` records a task once the surrounding transaction commits. The
+``run_tasks`` management command claims visible tasks in batches, hides them
+for ``visibility_timeout`` seconds while they run, and calls each handler
+once per batch with the de-duplicated keys (usually post ids) of its tasks.
+While a handler runs, a heartbeat keeps extending the timeout so a slow
+handler is not claimed by a second worker. Handlers manage their own
+transactions and must be idempotent. When a batch call raises, each key is
+retried on its own so one bad key cannot fail its neighbours. Tasks whose
+handler still raises become visible again after the timeout and are marked
+failed after ``max_attempts`` tries.
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import stats
+from .changes import record
+from .models import Change, Comment, Post, Task
+
+
+def enqueue(handler, key=None):
+    transaction.on_commit(lambda: Task.objects.create(handler=handler, key=key))
+
+
+def claim(batch_size=100, visibility_timeout=30):
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(failed=False, available_at__lte=now)
+            .order_by('available_at')[:batch_size]
+        )
+        Task.objects.filter(pk__in=[task.pk for task in tasks]).update(
+            available_at=now + timedelta(seconds=visibility_timeout),
+            attempts=F('attempts') + 1,
+        )
+    return tasks
+
+
+def extend(task_ids, visibility_timeout=30):
+    return Task.objects.filter(pk__in=task_ids).update(
+        available_at=timezone.now() + timedelta(seconds=visibility_timeout),
+    )
+
+
+@contextmanager
+def heartbeat(task_ids, visibility_timeout=30):
+    """Keep ``task_ids`` hidden from other workers until the block exits.
+
+    The timeout is pushed forward every third of ``visibility_timeout`` from a
+    separate thread, which has its own database connection. A beat that hits
+    a database error is retried on the next one.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(visibility_timeout / 3):
+                try:
+                    extend(task_ids, visibility_timeout)
+                except DatabaseError:
+                    pass
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_pending(batch_size=100, visibility_timeout=30, max_attempts=5):
+    tasks = claim(batch_size, visibility_timeout)
+    groups = defaultdict(list)
+    for task in tasks:
+        groups[task.handler].append(task)
+
+    for handler, group in groups.items():
+        task_ids = [task.pk for task in group]
+        try:
+            function = import_string(handler)
+        except ImportError as e:
+            _record_failure(task_ids, e, max_attempts)
+            continue
+        by_key = defaultdict(list)
+        for task in group:
+            by_key[task.key].append(task.pk)
+        with heartbeat(task_ids, visibility_timeout):
+            try:
+                function(sorted(key for key in by_key if key is not None))
+            except Exception as e:
+                if len(by_key) == 1:
+                    _record_failure(task_ids, e, max_attempts)
+                    continue
+                for key, key_task_ids in by_key.items():
+                    try:
+                        function([] if key is None else [key])
+                    except Exception as e:
+                        _record_failure(key_task_ids, e, max_attempts)
+                    else:
+                        Task.objects.filter(pk__in=key_task_ids).delete()
+            else:
+                Task.objects.filter(pk__in=task_ids).delete()
+    return len(tasks)
+
+
+def _record_failure(task_ids, error, max_attempts):
+    Task.objects.filter(pk__in=task_ids).update(last_error=repr(error))
+    Task.objects.filter(pk__in=task_ids, attempts__gte=max_attempts).update(failed=True)
+
+
+def touch_posts(post_ids):
+    latest_comment = (
+        Comment.objects.filter(post=OuterRef('pk'))
+        .order_by('-created_at')
+        .values('created_at')[:1]
+    )
+    with transaction.atomic():
+        Post.objects.filter(pk__in=post_ids).update(
+            updated_at=Coalesce(Subquery(latest_comment), F('updated_at')),
+            last_updated=timezone.now(),
+        )
+        record(Change.POST, post_ids)
+        author_ids = Post.objects.filter(pk__in=post_ids).values_list('author_id', flat=True).distinct()
+        stats.invalidate(list(author_ids))
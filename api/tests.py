@@ -1,9 +1,33 @@
-from django.test import TestCase
+import gzip
+import json
+import threading
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+from datetime import datetime, timedelta, timezone
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.db import connection, connections
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.core.exceptions import ValidationError, PermissionDenied
-from .models import Author, Post, Comment
-from .services import create_author, update_author, create_post, update_post, delete_post, create_comment
+from .models import Author, Change, Post, Comment, Task
+from .services import create_author, update_author, create_post, update_post, delete_post, delete_posts, delete_author_posts, create_comment
 from django.contrib.auth.models import User
 from graphene_django.utils.testing import graphql_query
+from .admin import pk_chunks
+from .changes import changes_since, parse_cursor, record
+from .partitions import (
+    add_months, create_partition, detach_partition, is_partitioned, partition_month,
+    partition_name, partitioning_enabled,
+)
+from .ratelimit import CacheStore, LocalMemoryStore, RateLimitMiddleware, client_address, get_store, release_slots
+from .revisions import apply_delta, encode_delta, reconstruct, record_revision
+from .stats import CACHE_KEY, author_stats
+from .tasks import claim, enqueue, extend, run_pending, touch_posts
+from core.warmup import warm_application
 
 class BlogApiTestCase(TestCase):
     def setUp(self):
@@ -40,6 +64,44 @@ class BlogApiTestCase(TestCase):
         result = delete_post(id=post.id)
         self.assertTrue(result)
 
+    def test_delete_post_removes_comments_in_chunks(self):
+        post = create_post(title="Test Post", content="This is a test post.", author_id=self.author.id)
+        for i in range(5):
+            create_comment(content=f"Comment {i}", post_id=post.id)
+        self.assertTrue(delete_post(id=post.id, chunk_size=2))
+        self.assertFalse(Post.objects.filter(pk=post.id).exists())
+        self.assertFalse(Comment.objects.filter(post_id=post.id).exists())
+
+    def test_delete_post_not_found(self):
+        with self.assertRaises(ValidationError):
+            delete_post(id=9999)
+
+    def test_delete_post_in_background_waits_for_commit(self):
+        post = create_post(title="Test Post", content="This is a test post.", author_id=self.author.id)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertTrue(delete_post(id=post.id, background=True))
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(Post.objects.filter(pk=post.id).exists())
+        run_pending()
+        self.assertFalse(Post.objects.filter(pk=post.id).exists())
+
+    def test_delete_author_posts(self):
+        other_author = create_author(name="Jane Doe", email="jane@example.com", bio="Another bio.", user_id=self.user.id)
+        kept = create_post(title="Kept Post", content="Stays.", author_id=other_author.id)
+        for i in range(5):
+            post = create_post(title=f"Post {i}", content="Content.", author_id=self.author.id)
+            create_comment(content="This is a comment.", post_id=post.id)
+        self.assertEqual(delete_author_posts(self.author.id, chunk_size=2), 5)
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertTrue(Post.objects.filter(pk=kept.id).exists())
+
+    def test_delete_posts_counts_only_posts(self):
+        post = create_post(title="Test Post", content="This is a test post.", author_id=self.author.id)
+        update_post(id=post.id, content="Edited content.")
+        create_comment(content="This is a comment.", post_id=post.id)
+        self.assertEqual(delete_posts(Post.objects.filter(pk=post.id)), 1)
+
     def test_create_comment(self):
         post = create_post(title="Test Post", content="This is a test post.", author_id=self.author.id)
         comment = create_comment(content="This is a comment.", post_id=post.id)
@@ -53,9 +115,483 @@ class BlogApiTestCase(TestCase):
     def test_post_last_updated_on_comment(self):
         post = create_post(title="Test Post", content="This is a test post.", author_id=self.author.id)
         original_updated_at = post.updated_at
-        comment = create_comment(content="This is a comment.", post_id=post.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = create_comment(content="This is a comment.", post_id=post.id)
+        run_pending()
         post.refresh_from_db()
         self.assertNotEqual(post.updated_at, original_updated_at)
+        self.assertEqual(post.updated_at, comment.created_at)
+
+
+handled_batches = []
+
+
+def record_keys(keys):
+    handled_batches.append(keys)
+
+
+def fail(keys):
+    raise RuntimeError("handler failed")
+
+
+def fail_on_two(keys):
+    if 2 in keys:
+        raise RuntimeError("bad key")
+    handled_batches.append(keys)
+
+
+def record_atomic_depth(keys):
+    handled_batches.append(len(connection.atomic_blocks))
+
+
+class AuthorStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.author = create_author(name="John Doe", email="john@example.com", bio="Author bio.", user_id=self.user.id)
+        self.other = create_author(name="Jane Doe", email="jane@example.com", bio="Another bio.", user_id=self.user.id)
+        self.quiet = create_post(title="Quiet Post", content="Content.", author_id=self.author.id)
+        self.popular = create_post(title="Popular Post", content="Content.", author_id=self.author.id)
+        for i in range(3):
+            create_comment(content=f"Comment {i}", post_id=self.popular.id)
+        create_comment(content="Comment", post_id=self.quiet.id)
+
+    def test_stats_for_a_batch_of_authors(self):
+        with self.assertNumQueries(1):
+            stats, other_stats = author_stats([self.author.id, self.other.id])
+        self.assertEqual(stats["post_count"], 2)
+        self.assertEqual(stats["total_comments"], 4)
+        self.assertEqual(stats["latest_post_date"], self.popular.created_at)
+        self.assertEqual(stats["most_commented_post"].id, self.popular.id)
+        self.assertEqual(other_stats["post_count"], 0)
+        self.assertIsNone(other_stats["most_commented_post"])
+
+    def test_stats_are_cached_and_invalidated_by_writes(self):
+        author_stats([self.author.id])
+        with self.assertNumQueries(0):
+            author_stats([self.author.id])
+        for i in range(3):
+            create_comment(content=f"Late comment {i}", post_id=self.quiet.id)
+        stats = author_stats([self.author.id])[0]
+        self.assertEqual(stats["total_comments"], 7)
+        self.assertEqual(stats["most_commented_post"].id, self.quiet.id)
+        delete_post(id=self.quiet.id)
+        stats = author_stats([self.author.id])[0]
+        self.assertEqual(stats["post_count"], 1)
+        self.assertEqual(stats["total_comments"], 3)
+
+    def test_stats_cache_is_shared_between_workers(self):
+        if not isinstance(caches['default'], RedisCache):
+            self.skipTest("REDIS_URL is not set; the cache is per process")
+        author_stats([self.author.id])
+        # A separate client, as another worker would have.
+        other_worker = caches.create_connection('default')
+        self.assertIsNotNone(other_worker.get(CACHE_KEY.format(self.author.id)))
+        create_comment(content="Late comment", post_id=self.quiet.id)
+        self.assertIsNone(other_worker.get(CACHE_KEY.format(self.author.id)))
+
+    def test_touching_posts_invalidates_stats(self):
+        author_stats([self.author.id])
+        touch_posts([self.quiet.id])
+        self.assertIsNone(cache.get(CACHE_KEY.format(self.author.id)))
+
+
+class PostRevisionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.author = create_author(name="John Doe", email="john@example.com", bio="Author bio.", user_id=self.user.id)
+
+    def test_delta_round_trip(self):
+        old = "first line\nsecond line\nthird line\n"
+        new = "first line\nsecond line, edited\nthird line\nfourth line"
+        self.assertEqual(apply_delta(old, encode_delta(old, new)), new)
+        self.assertEqual(apply_delta(new, encode_delta(new, "")), "")
+
+    @override_settings(POST_REVISION_SNAPSHOT_INTERVAL=3)
+    def test_every_version_is_reconstructed(self):
+        post = create_post(title="Versioned Post", content="line 0\n", author_id=self.author.id)
+        versions = ["line 0\n"]
+        for i in range(1, 8):
+            versions.append(versions[-1] + f"line {i}\n")
+            update_post(id=post.id, content=versions[-1])
+        update_post(id=post.id, title="Renamed Post")
+
+        history = list(post.revisions.order_by('number'))
+        self.assertEqual([r.number for r in history], list(range(1, 10)))
+        self.assertEqual([r.number for r in history if r.is_snapshot], [1, 4, 7])
+        self.assertEqual(history[-1].title, "Renamed Post")
+        contents = {}
+        self.assertEqual(reconstruct(history[-1], contents), versions[-1])
+        for revision, content in zip(history, versions):
+            self.assertEqual(reconstruct(revision, contents), content)
+
+    def test_unchanged_save_adds_no_revision(self):
+        post = create_post(title="Versioned Post", content="Content.", author_id=self.author.id)
+        post.save()
+        self.assertEqual(post.revisions.count(), 1)
+
+
+class PostRevisionLockTest(TransactionTestCase):
+    """Runs only against PostgreSQL, with a second connection saving the same post."""
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest("SELECT ... FOR UPDATE is a no-op on this backend")
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.author = create_author(name="John Doe", email="john@example.com", bio="Author bio.", user_id=self.user.id)
+
+    def test_concurrent_saves_take_consecutive_numbers(self):
+        post = create_post(title="Versioned Post", content="Draft.", author_id=self.author.id)
+        other = connections.create_connection('default')
+        try:
+            other.set_autocommit(False)
+            with other.cursor() as cursor:
+                cursor.execute("SELECT id FROM api_post WHERE id = %s FOR UPDATE", [post.pk])
+                cursor.execute(
+                    "INSERT INTO api_postrevision (post_id, number, title, is_snapshot, data, created_at) "
+                    "VALUES (%s, 2, %s, false, %s, NOW())",
+                    [post.pk, post.title, encode_delta("Draft.", "Other draft.")],
+                )
+            committer = threading.Timer(0.2, other.connection.commit)
+            committer.start()
+            post.content = "Final."
+            revision = record_revision(post)
+            committer.join()
+        finally:
+            other.close()
+        self.assertEqual(revision.number, 3)
+        self.assertEqual(reconstruct(revision), "Final.")
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        handled_batches.clear()
+
+    def test_tasks_are_deduplicated_per_key(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for key in (1, 2, 1, 1):
+                enqueue('api.tests.record_keys', key)
+        self.assertEqual(Task.objects.count(), 4)
+        self.assertEqual(run_pending(), 4)
+        self.assertEqual(handled_batches, [[1, 2]])
+        self.assertFalse(Task.objects.exists())
+
+    def test_enqueue_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            enqueue('api.tests.record_keys', 1)
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_is_retried_after_visibility_timeout(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('api.tests.fail', 1)
+        self.assertEqual(run_pending(visibility_timeout=60, max_attempts=2), 1)
+        task = Task.objects.get()
+        self.assertEqual(task.attempts, 1)
+        self.assertIn("handler failed", task.last_error)
+        self.assertFalse(task.failed)
+        self.assertEqual(run_pending(), 0)
+
+        Task.objects.update(available_at=task.created_at)
+        self.assertEqual(run_pending(visibility_timeout=60, max_attempts=2), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.attempts, 2)
+        self.assertTrue(task.failed)
+        Task.objects.update(available_at=task.created_at)
+        self.assertEqual(run_pending(), 0)
+
+    def test_run_tasks_command(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('api.tests.record_keys', 3)
+        call_command("run_tasks", "--once", stdout=StringIO())
+        self.assertEqual(handled_batches, [[3]])
+
+    def test_failing_key_does_not_fail_its_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for key in (1, 2, 3):
+                enqueue('api.tests.fail_on_two', key)
+        self.assertEqual(run_pending(), 3)
+        self.assertEqual(sorted(handled_batches), [[1], [3]])
+        task = Task.objects.get()
+        self.assertEqual(task.key, 2)
+        self.assertIn("bad key", task.last_error)
+
+    def test_extend_keeps_claimed_tasks_hidden(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('api.tests.record_keys', 1)
+        task = claim(visibility_timeout=1)[0]
+        self.assertEqual(extend([task.pk], visibility_timeout=3600), 1)
+        task.refresh_from_db()
+        self.assertGreater(task.available_at, datetime.now(timezone.utc) + timedelta(minutes=59))
+        self.assertEqual(run_pending(), 0)
+
+    def test_handlers_run_outside_a_worker_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('api.tests.record_atomic_depth', 1)
+        depth = len(connection.atomic_blocks)
+        run_pending()
+        self.assertEqual(handled_batches, [depth])
+
+
+class WarmupTest(TestCase):
+    def test_known_operations_validate(self):
+        self.assertEqual(warm_application(), {})
+
+    def test_invalid_operation_is_reported(self):
+        failures = warm_application(["{ post(id: 1) { missingField } }"])
+        self.assertEqual(len(failures), 1)
+
+
+class CommentPartitionTest(TestCase):
+    def test_partition_names_round_trip(self):
+        month = datetime(2024, 12, 1, tzinfo=timezone.utc)
+        self.assertEqual(partition_name(month), "api_comment_y2024m12")
+        self.assertEqual(partition_month("api_comment_y2024m12"), month)
+        self.assertIsNone(partition_month("api_comment_default"))
+
+    def test_add_months_crosses_years(self):
+        month = datetime(2024, 11, 1, tzinfo=timezone.utc)
+        self.assertEqual(add_months(month, 3), datetime(2025, 2, 1, tzinfo=timezone.utc))
+        self.assertEqual(add_months(month, -11), datetime(2023, 12, 1, tzinfo=timezone.utc))
+
+    @override_settings(COMMENT_PARTITIONING=False)
+    def test_command_requires_partitioning(self):
+        with self.assertRaises(CommandError):
+            call_command("comment_partitions")
+
+
+def comments_partitioned():
+    if not partitioning_enabled(connection):
+        return False
+    with connection.cursor() as cursor:
+        return is_partitioned(cursor)
+
+
+class PartitionedCommentTest(TransactionTestCase):
+    """Runs only against PostgreSQL with COMMENT_PARTITIONING enabled."""
+
+    old_month = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    def setUp(self):
+        if not comments_partitioned():
+            self.skipTest("api_comment is not partitioned")
+        self.user = User.objects.create_user(username='testuser', password='12345')
+        self.author = create_author(name="John Doe", email="john@example.com", bio="Author bio.", user_id=self.user.id)
+        self.post = create_post(title="Old Post", content="Content.", author_id=self.author.id)
+        Post.objects.filter(pk=self.post.pk).update(created_at=datetime(2020, 1, 10, tzinfo=timezone.utc))
+        comment = create_comment(content="Old comment.", post_id=self.post.id)
+        Comment.objects.filter(pk=comment.pk).update(created_at=datetime(2020, 1, 15, tzinfo=timezone.utc))
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {partition_name(self.old_month)}")
+
+    def test_create_partition_moves_rows_out_of_default(self):
+        with connection.cursor() as cursor:
+            create_partition(cursor, self.old_month)
+            cursor.execute(f"SELECT COUNT(*) FROM {partition_name(self.old_month)}")
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 1)
+
+    def test_archived_comments_do_not_block_post_deletion(self):
+        with connection.cursor() as cursor:
+            create_partition(cursor, self.old_month)
+            detach_partition(cursor, partition_name(self.old_month))
+        self.assertTrue(delete_post(id=self.post.id))
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+
+    def test_all_comments_prunes_partitions_older_than_the_post(self):
+        with connection.cursor() as cursor:
+            create_partition(cursor, self.old_month)
+        post = create_post(title="New Post", content="Content.", author_id=self.author.id)
+        create_comment(content="New comment.", post_id=post.id)
+        with CaptureQueriesContext(connection) as queries:
+            content = self.client.post(
+                '/graphql/', data={'query': '{ allComments(postId: %d) { content } }' % post.id},
+                content_type='application/json',
+            ).json()
+        self.assertEqual(content["data"]["allComments"], [{"content": "New comment."}])
+
+        sql = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT "api_comment"'))
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (ANALYZE, COSTS OFF, TIMING OFF) " + sql)
+            plan = [row[0] for row in cursor.fetchall()]
+        old_partition = [line for line in plan if partition_name(self.old_month) in line]
+        self.assertTrue(old_partition)
+        self.assertTrue(all("never executed" in line for line in old_partition), "\n".join(plan))
+
+
+class AdminTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username="admin", password="adminpassword", email="admin@example.com")
+        self.author = Author.objects.create(name="John Doe", email="john@example.com", bio="A passionate writer.", user=self.user)
+        self.post = Post.objects.create(title="Moderated Post", content="Content.", author=self.author)
+        self.comments = [Comment.objects.create(content=f"Comment {i}", post=self.post) for i in range(3)]
+        self.client.login(username="admin", password="adminpassword")
+
+    def test_changelists_render(self):
+        for model in ("author", "post", "comment"):
+            response = self.client.get(f"/admin/api/{model}/")
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('value="delete_selected"', response.content.decode())
+
+    def test_redact_comments(self):
+        response = self.client.post("/admin/api/comment/", {
+            "action": "redact_comments",
+            "_selected_action": [c.pk for c in self.comments[:2]],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Comment.objects.filter(content="[removed by moderator]").count(), 2)
+
+    def test_comment_actions_work_in_chunks(self):
+        extra = [Comment.objects.create(content=f"Extra {i}", post=self.post) for i in range(4)]
+        selected = Comment.objects.filter(pk__in=[c.pk for c in self.comments + extra])
+        self.assertEqual([len(chunk) for chunk in pk_chunks(selected, chunk_size=3)], [3, 3, 1])
+        response = self.client.post("/admin/api/comment/", {
+            "action": "delete_selected_comments",
+            "_selected_action": [c.pk for c in self.comments],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Comment.objects.count(), 4)
+
+    def test_single_post_delete_view_is_disabled(self):
+        response = self.client.get(f"/admin/api/post/{self.post.pk}/delete/")
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue(Post.objects.exists())
+
+    def test_delete_selected_posts(self):
+        response = self.client.post("/admin/api/post/", {
+            "action": "delete_selected_posts",
+            "_selected_action": [self.post.pk],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+
+class ChangeLogVisibilityTest(TransactionTestCase):
+    """Runs only against PostgreSQL, with a second connection holding a transaction open."""
+
+    def setUp(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest("transaction ids are only logged on PostgreSQL")
+
+    def test_uncommitted_lower_id_is_not_skipped(self):
+        other = connections.create_connection('default')
+        try:
+            other.set_autocommit(False)
+            with other.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO api_change (kind, object_id, xid, created_at) "
+                    "VALUES ('post', 1, pg_current_xact_id()::text::bigint, NOW())"
+                )
+            record(Change.POST, [2])
+            first = changes_since()
+            self.assertEqual(first["tombstones"], [])
+            other.commit()
+            second = changes_since(parse_cursor(first["cursor"]))
+            self.assertEqual([entry["id"] for entry in second["tombstones"]], [1, 2])
+        finally:
+            other.close()
+
+    def test_autocommit_record_stamps_its_own_transaction(self):
+        self.assertTrue(connection.get_autocommit())
+        record(Change.POST, [1, 2])
+        with connection.cursor() as cursor:
+            # xmin is the 32-bit id of the transaction that inserted the row.
+            cursor.execute("SELECT xid, xmin::text::bigint FROM api_change")
+            rows = cursor.fetchall()
+        self.assertEqual(len(rows), 2)
+        for xid, inserted_by in rows:
+            self.assertEqual(xid % 2 ** 32, inserted_by)
+
+
+class RateLimitTest(TestCase):
+    def setUp(self):
+        get_store.cache_clear()
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", password="testpassword")
+        self.author = Author.objects.create(name="John Doe", email="john@example.com", bio="A passionate writer.", user=self.user)
+        self.post = Post.objects.create(title="Limited Post", content="Content.", author=self.author)
+        self.client.login(username="testuser", password="testpassword")
+
+    def test_token_bucket_refills(self):
+        now = [0.0]
+        store = LocalMemoryStore(clock=lambda: now[0])
+        self.assertEqual(store.consume("key", rate=2, burst=2), 0)
+        self.assertEqual(store.consume("key", rate=2, burst=2), 0)
+        self.assertAlmostEqual(store.consume("key", rate=2, burst=2), 0.5)
+        now[0] = 0.5
+        self.assertEqual(store.consume("key", rate=2, burst=2), 0)
+
+    def test_concurrency_slots(self):
+        store = LocalMemoryStore()
+        self.assertTrue(store.acquire("key", 1))
+        self.assertFalse(store.acquire("key", 1))
+        store.release("key")
+        self.assertTrue(store.acquire("key", 1))
+
+    def test_cache_store_window(self):
+        now = [0.0]
+        store = CacheStore(clock=lambda: now[0])
+        self.assertEqual(store.consume("key", rate=2, burst=2), 0)
+        self.assertEqual(store.consume("key", rate=2, burst=2), 0)
+        self.assertAlmostEqual(store.consume("key", rate=2, burst=2), 1)
+        now[0] = 1.0
+        self.assertEqual(store.consume("key", rate=2, burst=2), 0)
+
+    def test_cache_store_slots_are_shared(self):
+        store, other_worker = CacheStore(), CacheStore()
+        self.assertTrue(store.acquire("key", 1))
+        self.assertFalse(other_worker.acquire("key", 1))
+        store.release("key")
+        self.assertTrue(other_worker.acquire("key", 1))
+
+    @override_settings(GRAPHQL_RATE_LIMITS={'allPosts': {'concurrency': 1}})
+    def test_slot_is_held_until_the_operation_finishes(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        info = SimpleNamespace(path=SimpleNamespace(prev=None), field_name='allPosts', context=request)
+        RateLimitMiddleware().resolve(lambda root, info: [], None, info)
+        key = f"user:{self.user.pk}:allPosts"
+        self.assertFalse(get_store().acquire(key, 1))
+        release_slots(request)
+        self.assertTrue(get_store().acquire(key, 1))
+
+    @override_settings(GRAPHQL_RATE_LIMITS={'allPosts': {'concurrency': 1}})
+    def test_batched_operations_release_their_slots(self):
+        operations = [{'query': '{ allPosts { edges { node { id author { name } } } } }'}] * 2
+        results = self.client.post('/graphql/', data=operations, content_type='application/json').json()
+        self.assertEqual([result.get("errors") for result in results], [None, None])
+
+    @override_settings(GRAPHQL_RATE_LIMITS={'createComment': {'rate': 0.001, 'burst': 2}})
+    def test_mutation_is_rate_limited_per_user(self):
+        query = 'mutation { createComment(content: "Hi", postId: %d) { comment { id } } }' % self.post.id
+        for _ in range(2):
+            content = self.client.post('/graphql/', data={'query': query}, content_type='application/json').json()
+            self.assertIsNone(content.get("errors"))
+        content = self.client.post('/graphql/', data={'query': query}, content_type='application/json').json()
+        self.assertEqual(content["errors"][0]["extensions"]["code"], "RATE_LIMITED")
+        self.assertEqual(Comment.objects.filter(post=self.post).count(), 2)
+
+    @override_settings(GRAPHQL_RATE_LIMITS={'allPosts': {'rate': 0.001, 'burst': 1}})
+    def test_anonymous_limit_ignores_authorization_header(self):
+        self.client.logout()
+        query = {'query': '{ allPosts { edges { node { id } } } }'}
+        content = self.client.post('/graphql/', data=query, content_type='application/json').json()
+        self.assertIsNone(content.get("errors"))
+        content = self.client.post(
+            '/graphql/', data=query, content_type='application/json', HTTP_AUTHORIZATION="Foo 2",
+        ).json()
+        self.assertEqual(content["errors"][0]["extensions"]["code"], "RATE_LIMITED")
+
+    def test_client_address_uses_trusted_proxies(self):
+        request = RequestFactory().get('/', REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="6.6.6.6, 203.0.113.7")
+        self.assertEqual(client_address(request), "10.0.0.1")
+        with override_settings(GRAPHQL_RATE_LIMIT_TRUSTED_PROXIES=1):
+            self.assertEqual(client_address(request), "203.0.113.7")
+            self.assertEqual(client_address(RequestFactory().get('/', REMOTE_ADDR="10.0.0.1")), "10.0.0.1")
+        with override_settings(GRAPHQL_RATE_LIMIT_TRUSTED_PROXIES=2):
+            self.assertEqual(client_address(request), "6.6.6.6")
 
 
 class BlogAPIQueryTest(TestCase):
@@ -215,3 +751,188 @@ class BlogAPIQueryTest(TestCase):
         content = self.graphql_query(query)
         self.assertIsNone(content.get("errors"))
         self.assertEqual(content["data"]["post"]["title"], "Single Post")
+
+    def test_batched_operations(self):
+        post = Post.objects.create(title="Batched Post", content="Batched content.", author=self.author)
+        Comment.objects.create(content="A comment.", post=post)
+        operations = [
+            {'query': '{ post(id: %d) { title } }' % post.id},
+            {'query': '{ allComments(postId: %d) { content } }' % post.id},
+            {'query': '{ post(id: %d) { content } }' % post.id},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/graphql/', data=operations, content_type='application/json')
+        results = response.json()
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["data"]["post"]["title"], "Batched Post")
+        self.assertEqual(results[1]["data"]["allComments"][0]["content"], "A comment.")
+        self.assertEqual(results[2]["data"]["post"]["content"], "Batched content.")
+        # allComments bounds its read by the post's created_at in a subquery;
+        # only statements selecting posts directly count as post lookups.
+        post_queries = [q for q in queries.captured_queries if q['sql'].partition(' FROM ')[2].startswith('"api_post"')]
+        self.assertEqual(len(post_queries), 1)
+
+    def test_batched_mutation_clears_loader_cache(self):
+        post = Post.objects.create(title="Old Title", content="Old content.", author=self.author)
+        operations = [
+            {'query': '{ post(id: %d) { title } }' % post.id},
+            {'query': 'mutation { updatePost(id: "%d", title: "New Title") { errors } }' % post.id},
+            {'query': '{ post(id: %d) { title } }' % post.id},
+        ]
+        response = self.client.post('/graphql/', data=operations, content_type='application/json')
+        results = response.json()
+        self.assertEqual(results[0]["data"]["post"]["title"], "Old Title")
+        self.assertEqual(results[2]["data"]["post"]["title"], "New Title")
+
+    def test_batch_size_limit(self):
+        operations = [{'query': '{ allComments(postId: 1) { id } }'}] * 21
+        response = self.client.post('/graphql/', data=operations, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_entries_must_be_objects(self):
+        for operations in ([1], [None], [{'query': '{ allPosts { edges { node { id } } } }'}, "query"]):
+            response = self.client.post('/graphql/', data=operations, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_large_response_is_gzipped(self):
+        for i in range(20):
+            Post.objects.create(title=f"Post {i}", content="Long post content. " * 20, author=self.author)
+        response = self.client.post(
+            '/graphql/',
+            data={'query': '{ allPosts { edges { node { title content } } } }'},
+            content_type='application/json',
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        content = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(content["data"]["allPosts"]["edges"]), 20)
+
+    def test_small_response_is_not_compressed(self):
+        response = self.client.post(
+            '/graphql/',
+            data={'query': '{ allComments(postId: 1) { id } }'},
+            content_type='application/json',
+            HTTP_ACCEPT_ENCODING='gzip',
+        )
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.json()["data"]["allComments"], [])
+
+    def sync(self, cursor=None, limit=None):
+        arguments = ", ".join(
+            f"{name}: {value}" for name, value in (("cursor", cursor and f'"{cursor}"'), ("limit", limit)) if value
+        )
+        query = '''
+            {
+                changesSince%s {
+                    posts { id title }
+                    comments { id content }
+                    tombstones { kind id }
+                    cursor
+                    hasMore
+                }
+            }
+        ''' % (f"({arguments})" if arguments else "")
+        content = self.graphql_query(query)
+        self.assertIsNone(content.get("errors"))
+        return content["data"]["changesSince"]
+
+    def test_changes_since(self):
+        initial = self.sync()
+        self.assertEqual(initial["posts"], [])
+        post = create_post(title="Synced Post", content="Content.", author_id=self.author.id)
+        create_comment(content="First comment.", post_id=post.id)
+        update_post(id=post.id, content="Edited content.")
+
+        changes = self.sync(initial["cursor"])
+        self.assertEqual([p["title"] for p in changes["posts"]], ["Synced Post"])
+        self.assertEqual([c["content"] for c in changes["comments"]], ["First comment."])
+        self.assertEqual(changes["tombstones"], [])
+        self.assertFalse(changes["hasMore"])
+
+        self.assertEqual(self.sync(changes["cursor"])["posts"], [])
+        delete_post(id=post.id)
+        deletions = self.sync(changes["cursor"])
+        self.assertEqual(deletions["posts"], [])
+        self.assertEqual(deletions["tombstones"], [{"kind": "post", "id": changes["posts"][0]["id"]}])
+
+    def test_changes_since_pages_through_the_log(self):
+        for i in range(3):
+            Post.objects.create(title=f"Post {i}", content="Content.", author=self.author)
+        first = self.sync(limit=2)
+        self.assertEqual(len(first["posts"]), 2)
+        self.assertTrue(first["hasMore"])
+        second = self.sync(first["cursor"], limit=2)
+        self.assertEqual([p["title"] for p in second["posts"]], ["Post 2"])
+        self.assertFalse(second["hasMore"])
+
+    def test_changes_since_waits_for_in_flight_transactions(self):
+        cursor = self.sync()["cursor"]
+        early = Post.objects.create(title="Early", content="Content.", author=self.author)
+        late = Post.objects.create(title="Late", content="Content.", author=self.author)
+        # "Early" got the lower change id, but its transaction (11) is still
+        # running when "Late" commits from transaction 10.
+        Change.objects.filter(kind=Change.POST, object_id=early.pk).update(xid=11)
+        Change.objects.filter(kind=Change.POST, object_id=late.pk).update(xid=10)
+        with mock.patch('api.changes.visible_horizon', return_value=11):
+            first = self.sync(cursor)
+        self.assertEqual([p["title"] for p in first["posts"]], ["Late"])
+        with mock.patch('api.changes.visible_horizon', return_value=12):
+            second = self.sync(first["cursor"])
+        self.assertEqual([p["title"] for p in second["posts"]], ["Early"])
+
+    def test_bare_id_cursor_is_accepted(self):
+        self.assertEqual(parse_cursor("42"), (0, 42))
+        self.assertEqual(parse_cursor("7.42"), (7, 42))
+        self.assertEqual(self.sync("0")["posts"], [])
+
+    def test_authors_stats(self):
+        cache.clear()
+        post = Post.objects.create(title="Stats Post", content="Content.", author=self.author)
+        Comment.objects.create(content="A comment.", post=post)
+        query = '''
+            {
+                authorsStats(authorIds: [%d]) {
+                    authorId
+                    postCount
+                    totalComments
+                    mostCommentedPost { title }
+                }
+            }
+        ''' % self.author.id
+        content = self.graphql_query(query)
+        self.assertIsNone(content.get("errors"))
+        stats = content["data"]["authorsStats"][0]
+        self.assertEqual(stats["postCount"], 1)
+        self.assertEqual(stats["totalComments"], 1)
+        self.assertEqual(stats["mostCommentedPost"]["title"], "Stats Post")
+
+    def test_post_revisions(self):
+        post = create_post(title="Edited Post", content="Draft.", author_id=self.author.id)
+        update_post(id=post.id, content="Final.")
+        query = '''
+            {
+                post(id: %d) {
+                    revisions(first: 5) {
+                        edges { node { number title content } }
+                    }
+                }
+            }
+        ''' % post.id
+        content = self.graphql_query(query)
+        self.assertIsNone(content.get("errors"))
+        nodes = [edge["node"] for edge in content["data"]["post"]["revisions"]["edges"]]
+        self.assertEqual([(n["number"], n["content"]) for n in nodes], [(2, "Final."), (1, "Draft.")])
+
+    def test_post_revisions_are_private_to_the_author(self):
+        post = create_post(title="Edited Post", content="Secret draft.", author_id=self.author.id)
+        update_post(id=post.id, content="Final.")
+        query = '{ post(id: %d) { title revisions(first: 5) { edges { node { content } } } } }' % post.id
+        User.objects.create_user(username="reader", password="readerpassword")
+        self.client.login(username="reader", password="readerpassword")
+        content = self.graphql_query(query)
+        self.assertIn("not allowed", content["errors"][0]["message"])
+        self.assertIsNone(content["data"]["post"]["revisions"])
+        self.client.logout()
+        content = self.graphql_query(query)
+        self.assertIn("not allowed", content["errors"][0]["message"])
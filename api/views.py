@@ -1,3 +1,116 @@
-from django.shortcuts import render
+import json
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponseBadRequest
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from graphene_django.views import GraphQLView, HttpError
+
+from .ratelimit import release_slots
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip is always available
+    brotli = None
+
+
+def encode_json(data, pretty=False):
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS if pretty else 0
+        return orjson.dumps(data, option=option).decode()
+    if pretty:
+        return json.dumps(data, sort_keys=True, indent=2, separators=(",", ": "))
+    return json.dumps(data, separators=(",", ":"))
+
+
+def accepted_encodings(request):
+    accepted = set()
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def compress_response(request, response):
+    """Compress ``response`` with brotli or gzip when it is worth it.
+
+    Bodies under ``GRAPHQL_COMPRESSION_MIN_SIZE`` bytes are sent as-is, since
+    the framing overhead outweighs the saving on small payloads.
+    """
+    if response.streaming or response.has_header("Content-Encoding"):
+        return response
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if len(response.content) < getattr(settings, 'GRAPHQL_COMPRESSION_MIN_SIZE', 1024):
+        return response
+
+    accepted = accepted_encodings(request)
+    if brotli is not None and "br" in accepted:
+        content = brotli.compress(
+            response.content,
+            quality=getattr(settings, 'GRAPHQL_BROTLI_QUALITY', 4),
+        )
+        encoding = "br"
+    elif "gzip" in accepted:
+        content = compress_string(response.content)
+        encoding = "gzip"
+    else:
+        return response
+
+    if len(content) >= len(response.content):
+        return response
+    response.content = content
+    response["Content-Length"] = str(len(content))
+    response["Content-Encoding"] = encoding
+    return response
+
+
+class BlogGraphQLView(GraphQLView):
+    """GraphQL endpoint that also accepts a JSON array of operations.
+
+    A batched body is executed operation by operation against the same
+    request, so authentication, middleware and the database connection are
+    paid once and the loader cache in ``api.loaders`` is shared. The response
+    is an array of results in request order.
+
+    Results are encoded with orjson when it is installed and compressed
+    according to the client's ``Accept-Encoding``.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        return compress_response(request, response)
+
+    def execute_graphql_request(self, request, *args, **kwargs):
+        try:
+            return super().execute_graphql_request(request, *args, **kwargs)
+        finally:
+            release_slots(request)
+
+    def json_encode(self, request, d, pretty=False):
+        return encode_json(d, pretty=self.pretty or pretty or bool(request.GET.get("pretty")))
+
+    def parse_body(self, request):
+        if self.get_content_type(request) == "application/json" and request.body.lstrip()[:1] == b"[":
+            self.batch = True
+        data = super().parse_body(request)
+        max_batch_size = getattr(settings, 'GRAPHQL_MAX_BATCH_SIZE', 20)
+        if self.batch and len(data) > max_batch_size:
+            raise HttpError(HttpResponseBadRequest(
+                f"Batch requests are limited to {max_batch_size} operations."
+            ))
+        if self.batch and not all(isinstance(entry, dict) for entry in data):
+            raise HttpError(HttpResponseBadRequest("Batch entries must be JSON objects."))
+        return data
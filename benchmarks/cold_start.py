@@ -0,0 +1,67 @@
+"""Measure worker cold start and first-request latency, with and without warm-up.
+
+Each run happens in a fresh interpreter, as a newly forked worker would
+see it without preload:
+
+    python benchmarks/cold_start.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import io, json, os, sys, time
+sys.path.insert(0, {root!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+start = time.perf_counter()
+from core.wsgi import application
+loaded = time.perf_counter()
+if {warm}:
+    from core.warmup import warm_application, warm_connections
+    warm_application()
+    warm_connections()
+warmed = time.perf_counter()
+
+body = json.dumps({{"query": "{{ allComments(postId: 1) {{ id }} }}"}}).encode()
+
+def request():
+    environ = {{
+        'REQUEST_METHOD': 'POST', 'PATH_INFO': '/graphql/', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '8000', 'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body), 'wsgi.url_scheme': 'http', 'HTTP_HOST': 'localhost',
+    }}
+    began = time.perf_counter()
+    b''.join(application(environ, lambda status, headers: None))
+    return time.perf_counter() - began
+
+first = request()
+second = request()
+print(json.dumps({{'load': loaded - start, 'warmup': warmed - loaded, 'first': first, 'second': second}}))
+"""
+
+
+def measure(warm, runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", CHILD.format(root=ROOT, warm=warm)])
+        samples.append(json.loads(output.decode().strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) * 1000 for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'':<10}{'load':>10}{'warm-up':>10}{'1st req':>10}{'2nd req':>10}  (median ms)")
+    for label, warm in (("cold", False), ("warmed", True)):
+        result = measure(warm, args.runs)
+        print(f"{label:<10}{result['load']:>10.1f}{result['warmup']:>10.1f}{result['first']:>10.1f}{result['second']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
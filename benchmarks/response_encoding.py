@@ -0,0 +1,70 @@
+"""Compare response encoding for a realistic ``allPosts`` payload.
+
+Measures the stdlib encoder used by graphene-django's ``GraphQLView``
+against ``api.views.encode_json``, and the wire size with gzip and brotli.
+
+    python benchmarks/response_encoding.py [--posts 500] [--comments 10]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+import django
+django.setup()
+
+from django.utils.text import compress_string
+
+from api.views import brotli, encode_json, orjson
+
+
+def build_payload(posts, comments):
+    paragraph = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 12
+    return {"data": {"allPosts": {"edges": [
+        {"node": {
+            "id": f"UG9zdFR5cGU6{i}",
+            "title": f"Post number {i}",
+            "content": paragraph,
+            "createdAt": "2024-08-16T13:30:00.000000+00:00",
+            "author": {"id": str(i % 20), "name": f"Author {i % 20}"},
+            "comments": [
+                {"id": str(i * comments + j), "content": f"Comment {j} on post {i}."}
+                for j in range(comments)
+            ],
+        }}
+        for i in range(posts)
+    ]}}}
+
+
+def report(label, seconds, number):
+    print(f"{label:<28}{seconds / number * 1000:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--comments', type=int, default=10)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    payload = build_payload(args.posts, args.comments)
+    body = encode_json(payload).encode()
+    number = args.number
+    print(f"payload: {args.posts} posts x {args.comments} comments, {len(body):,} bytes")
+
+    report("stdlib json.dumps", timeit.timeit(
+        lambda: json.dumps(payload, separators=(",", ":")), number=number), number)
+    report(f"encode_json ({'orjson' if orjson else 'stdlib'})", timeit.timeit(
+        lambda: encode_json(payload), number=number), number)
+    report("gzip", timeit.timeit(lambda: compress_string(body), number=number), number)
+    print(f"{'gzip size':<28}{len(compress_string(body)):9,} bytes")
+    if brotli is not None:
+        report("brotli q4", timeit.timeit(lambda: brotli.compress(body, quality=4), number=number), number)
+        print(f"{'brotli q4 size':<28}{len(brotli.compress(body, quality=4)):9,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Storage and reconstruction cost of delta-compressed post revisions.
+
+Simulates a long post receiving hundreds of small edits and compares the
+bytes stored by ``api.revisions`` for several snapshot intervals against
+storing every version as a compressed full copy. Reconstruction time is
+measured for the worst case of a full chain of diffs.
+
+    python benchmarks/revisions.py [--paragraphs 200] [--edits 500]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+import django
+django.setup()
+
+from api.revisions import apply_delta, decode_snapshot, encode_delta, encode_snapshot
+
+
+def simulate_versions(paragraphs, edits, seed=0):
+    rng = random.Random(seed)
+    words = "the quick brown fox jumps over a lazy dog while editors argue about commas".split()
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(20, 60))) + ".\n"
+
+    lines = [sentence() for _ in range(paragraphs)]
+    versions = ["".join(lines)]
+    for _ in range(edits):
+        position = rng.randrange(len(lines))
+        action = rng.random()
+        if action < 0.7:
+            lines[position] = sentence()
+        elif action < 0.9:
+            lines.insert(position, sentence())
+        elif len(lines) > 1:
+            del lines[position]
+        versions.append("".join(lines))
+    return versions
+
+
+def store(versions, interval):
+    stored = []
+    for number, content in enumerate(versions):
+        if number % interval == 0:
+            stored.append((True, encode_snapshot(content)))
+        else:
+            stored.append((False, encode_delta(versions[number - 1], content)))
+    return stored
+
+
+def rebuild(chain):
+    content = None
+    for is_snapshot, data in chain:
+        content = decode_snapshot(data) if is_snapshot else apply_delta(content, data)
+    return content
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--paragraphs', type=int, default=200)
+    parser.add_argument('--edits', type=int, default=500)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    versions = simulate_versions(args.paragraphs, args.edits)
+    raw = sum(len(v.encode()) for v in versions)
+    full = sum(len(encode_snapshot(v)) for v in versions)
+    print(f"{len(versions)} versions, ~{len(versions[-1]):,} chars each")
+    print(f"{'raw copies':<24}{raw:>14,} bytes")
+    print(f"{'compressed copies':<24}{full:>14,} bytes")
+
+    for interval in (10, 20, 50):
+        stored = store(versions, interval)
+        size = sum(len(data) for _, data in stored)
+        worst = stored[:interval]
+        assert rebuild(worst) == versions[interval - 1]
+        seconds = timeit.timeit(lambda: rebuild(worst), number=args.number) / args.number
+        print(f"{f'deltas, interval {interval}':<24}{size:>14,} bytes"
+              f"  ({size / full:.1%} of compressed)  worst rebuild {seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,7 +27,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-80kg^76yf78%iyb3%0&h%jner%zye*fz$3@tcthl+jlzt9p1l&'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv("DEBUG", "True") == "True"
 
 ALLOWED_HOSTS = ["blog-api-jdli.onrender.com","localhost", "0.0.0.0", "127.0.0.1"]
 
@@ -89,6 +89,11 @@ DATABASES = {
         'PASSWORD': os.getenv("DB_PASSWORD"),
         'HOST': os.getenv("DB_HOST"),
         'PORT': os.getenv("DB_PORT", 5432),
+        # Keep connections open between requests, so the one each worker opens
+        # before serving (core.warmup.warm_connections) is reused rather than
+        # closed when the first request starts.
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
     # 'default': {
     #     'ENGINE': 'django.db.backends.sqlite3',
@@ -96,6 +101,23 @@ DATABASES = {
     # }
 }
 
+# With REDIS_URL set the cache is shared by every worker, so clearing cached
+# author stats after a write takes effect everywhere. Without it each process
+# keeps its own cache, which only suits a single-process development server.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -140,10 +162,37 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 GRAPHENE = {
     'SCHEMA': 'api.schema.schemas',
+    # Graphene wraps resolvers so that later entries run first: the rate
+    # limiter is listed ahead of the JWT middleware to see the resolved user.
     'MIDDLEWARE': [
+        'api.ratelimit.RateLimitMiddleware',
         'graphql_jwt.middleware.JSONWebTokenMiddleware',
+        'api.loaders.LoaderCacheMiddleware',
     ],
 }
+GRAPHQL_MAX_BATCH_SIZE = 20
+GRAPHQL_COMPRESSION_MIN_SIZE = 1024
+GRAPHQL_BROTLI_QUALITY = 4
+# Operations the clients send on page load; validated against the schema by
+# core.warmup before gunicorn forks its workers.
+GRAPHQL_WARMUP_OPERATIONS = [
+    "query Post($id: Int!) { post(id: $id) { id title content author { id name } comments { id content } } }",
+    "query Comments($postId: Int!) { allComments(postId: $postId) { id content createdAt } }",
+    "query AuthorPosts($authorId: Int) { allPosts(authorId: $authorId) { edges { node { id title } } } }",
+    "query Sync($cursor: String) { changesSince(cursor: $cursor) { posts { id } comments { id } tombstones { kind id } cursor hasMore } }",
+]
+AUTHOR_STATS_CACHE_TIMEOUT = 300
+POST_REVISION_SNAPSHOT_INTERVAL = 20
+# Counters live in the shared cache, so set REDIS_URL in production.
+GRAPHQL_RATE_LIMIT_STORE = 'api.ratelimit.CacheStore'
+# Number of reverse proxies in front of the app (1 on Render). Each appends
+# the address it received the request from to X-Forwarded-For.
+GRAPHQL_RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv("TRUSTED_PROXY_COUNT", 0))
+GRAPHQL_RATE_LIMITS = {
+    'createComment': {'rate': 1, 'burst': 10, 'concurrency': 2},
+    'createPost': {'rate': 0.2, 'burst': 5, 'concurrency': 2},
+    'allPosts': {'rate': 5, 'burst': 20, 'concurrency': 4},
+}
 
 AUTHENTICATION_BACKENDS = [
     'graphql_jwt.backends.JSONWebTokenBackend',
@@ -160,5 +209,12 @@ GRAPHQL_JWT = {
 }
 GRAPHQL_PLAYGROUND = True
 
+# Monthly range partitioning of api_comment (PostgreSQL only), applied by
+# migration 0006 and maintained with `manage.py comment_partitions`.
+COMMENT_PARTITIONING = os.getenv("COMMENT_PARTITIONING", "False") == "True"
+COMMENT_PARTITION_MONTHS_AHEAD = 3
+COMMENT_PARTITION_MONTHS_RETAINED = None
+COMMENT_PARTITION_ARCHIVE_SCHEMA = None
+
 RAINBOWTESTS_SHOW_MESSAGES = True
 TEST_RUNNER = 'rainbowtests.test.runner.RainbowDiscoverCoverageRunner'
\ No newline at end of file
@@ -1,12 +1,13 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
-from graphene_django.views import GraphQLView
 from django.views.decorators.csrf import csrf_exempt
 from api.schema import schema
+from api.views import BlogGraphQLView
 import graphql_jwt
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('graphql/', csrf_exempt(GraphQLView.as_view(graphiql=True, schema=schema))),
+    path('graphql/', csrf_exempt(BlogGraphQLView.as_view(graphiql=settings.DEBUG, schema=schema))),
 
 ]
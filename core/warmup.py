@@ -0,0 +1,55 @@
+"""Warm-up hooks for the production server profile in ``gunicorn.conf.py``.
+
+``warm_application`` runs once in the gunicorn master after the application is
+preloaded, so the work it does is shared copy-on-write by every worker.
+``warm_connections`` runs in each worker right after the fork, since
+database connections must never cross a fork.
+"""
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+from graphql import parse, validate
+from graphql_jwt.settings import jwt_settings
+
+JWT_REQUEST_HANDLERS = (
+    "JWT_ENCODE_HANDLER",
+    "JWT_DECODE_HANDLER",
+    "JWT_PAYLOAD_HANDLER",
+    "JWT_PAYLOAD_GET_USERNAME_HANDLER",
+    "JWT_GET_USER_BY_NATURAL_KEY_HANDLER",
+    "JWT_ALLOW_ANY_HANDLER",
+    "JWT_ALLOW_ANY_CLASSES",
+)
+
+
+def warm_application(operations=None):
+    """Load the URLconf and schema and validate the known operations.
+
+    Returns a mapping of each operation that failed to validate to its
+    error messages, so callers can report drift between clients and schema.
+    """
+    from api.schema import schema
+    from graphene_django.filter import DjangoFilterConnectionField
+
+    get_resolver().url_patterns
+    graphql_schema = schema.graphql_schema
+    for field in schema.query._meta.fields.values():
+        if isinstance(field, DjangoFilterConnectionField):
+            field.filterset_class
+    for name in JWT_REQUEST_HANDLERS:
+        getattr(jwt_settings, name)
+
+    if operations is None:
+        operations = getattr(settings, 'GRAPHQL_WARMUP_OPERATIONS', [])
+    failures = {}
+    for operation in operations:
+        errors = validate(graphql_schema, parse(operation))
+        if errors:
+            failures[operation] = [error.message for error in errors]
+    return failures
+
+
+def warm_connections():
+    for connection in connections.all():
+        connection.close()
+        connection.ensure_connection()
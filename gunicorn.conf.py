@@ -0,0 +1,28 @@
+"""Production server profile: ``gunicorn`` picks this file up automatically.
+
+The application and GraphQL schema are loaded once in the master before
+workers fork, and every worker opens its database connection before it
+accepts its first request.
+"""
+import multiprocessing
+import os
+
+wsgi_app = "core.wsgi:application"
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+
+def when_ready(server):
+    from core.warmup import warm_application
+
+    for operation, errors in warm_application().items():
+        server.log.warning("Warm-up operation failed validation: %s %s", " ".join(operation.split()), errors)
+
+
+def post_fork(server, worker):
+    from core.warmup import warm_connections
+
+    warm_connections()